@@ -8,6 +8,9 @@ import json
 from collections import defaultdict
 from statistics import mean
 
+import manicai_trace
+from manicai_trace import span
+
 
 def pct(xs: list[float], q: float) -> float:
     if not xs:
@@ -19,7 +22,7 @@ def pct(xs: list[float], q: float) -> float:
 
 def load_events(path: str) -> list[dict]:
     out = []
-    with open(path, "r", encoding="utf-8") as f:
+    with span("history.parse", path=path) as sp, open(path, "r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             if not line:
@@ -28,19 +31,12 @@ def load_events(path: str) -> list[dict]:
                 out.append(json.loads(line))
             except json.JSONDecodeError:
                 pass
-    return sorted(out, key=lambda e: e.get("ts", 0))
-
-
-def main() -> int:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("path", help="NDJSON file exported by ManicAI")
-    args = ap.parse_args()
+        sp.set(events=len(out))
+    with span("history.sort"):
+        return sorted(out, key=lambda e: e.get("ts", 0))
 
-    events = load_events(args.path)
-    if len(events) < 2:
-        print("insufficient data: need >=2 events")
-        return 1
 
+def report_overall(events: list[dict]) -> None:
     deltas = [max(0.0, events[i]["ts"] - events[i - 1]["ts"]) for i in range(1, len(events))]
     print(f"events={len(events)}")
     print(f"mean_interval={mean(deltas):.2f}s")
@@ -49,6 +45,8 @@ def main() -> int:
     print(f"burst_ratio(<10s)={100.0 * sum(1 for d in deltas if d < 10)/len(deltas):.2f}%")
     print(f"longest_idle={max(deltas):.2f}s")
 
+
+def report_breakdown(events: list[dict]) -> None:
     by_route: dict[str, list[float]] = defaultdict(list)
     by_track: dict[str, list[float]] = defaultdict(list)
     for i in range(1, len(events)):
@@ -66,6 +64,23 @@ def main() -> int:
         xs = by_track[k]
         print(f"- {k}: n={len(xs)} mean={mean(xs):.2f}s p90={pct(xs, 0.9):.2f}s")
 
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", help="NDJSON file exported by ManicAI")
+    manicai_trace.add_trace_argument(ap)
+    args = ap.parse_args(argv)
+    manicai_trace.configure("analyze_prompt_cadence", args.trace)
+
+    events = load_events(args.path)
+    if len(events) < 2:
+        print("insufficient data: need >=2 events")
+        return 1
+
+    with span("cadence.overall"):
+        report_overall(events)
+    with span("cadence.breakdown"):
+        report_breakdown(events)
     return 0
 
 
@@ -1,24 +1,36 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
 import glob
 import json
 import os
+import sys
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import manicai_trace  # noqa: E402
+from manicai_trace import span  # noqa: E402
+
 
 def load(path: str) -> dict:
-    with open(path, "r", encoding="utf-8") as f:
+    with span("snapshot.load", path=os.path.basename(path)), open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    manicai_trace.add_trace_argument(ap)
+    args = ap.parse_args(argv)
+    manicai_trace.configure("weekly_benchmark_drift", args.trace)
+
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
     snap_dir = os.path.join(root, "logs", "snapshots")
     out_dir = os.path.join(root, "logs", "cadence")
     os.makedirs(out_dir, exist_ok=True)
 
-    snaps = sorted(glob.glob(os.path.join(snap_dir, "state-*.json")))
+    with span("snapshot.scan"):
+        snaps = sorted(glob.glob(os.path.join(snap_dir, "state-*.json")))
     if len(snaps) < 2:
         print("need >=2 snapshots for drift report")
         return 1
@@ -43,7 +55,7 @@ def main() -> int:
 
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%SZ")
     out = os.path.join(out_dir, f"weekly-drift-{ts}.json")
-    with open(out, "w", encoding="utf-8") as f:
+    with span("report.write"), open(out, "w", encoding="utf-8") as f:
         json.dump(report, f, indent=2)
     print(f"[weekly-drift] wrote {out}")
     print(json.dumps(report, indent=2))
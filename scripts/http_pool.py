@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Keep-alive connection pooling for urllib, used by `manicai-tools serve`.
+
+urllib's stock handlers send `Connection: close` and open a fresh socket
+(DNS + TCP connect) per request. Installing the opener from build_opener()
+makes every urllib.request.urlopen() call in the scripts reuse idle
+connections per host instead. Bodies are read eagerly so the connection
+can go back to the pool before the caller sees the response. A request
+that fails on a stale reused connection is retried once on a fresh one,
+unless it is a POST that may already have been sent.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import socket
+import threading
+import urllib.error
+import urllib.request
+import urllib.response
+
+STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Safe to re-send after the server may already have received them.
+IDEMPOTENT = {"GET", "HEAD"}
+
+
+class ConnectionPool:
+    def __init__(self, max_idle_per_host: int = 4):
+        self.max_idle = max_idle_per_host
+        self._idle: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def _checkout(self, key: tuple):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+        return None, False
+
+    def _checkin(self, key: tuple, conn) -> None:
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def open(self, conn_class, req, **conn_kwargs):
+        host = req.host
+        method = req.get_method()
+        key = (conn_class.__name__, host)
+        headers = dict(req.unredirected_hdrs)
+        headers.update((k, v) for k, v in req.headers.items() if k not in headers)
+        headers = {name.title(): val for name, val in headers.items()}
+
+        conn, reused = self._checkout(key)
+        for attempt in (0, 1):
+            if conn is None:
+                conn = conn_class(host, timeout=req.timeout, **conn_kwargs)
+                reused = False
+            conn.timeout = req.timeout
+            if conn.sock is not None and req.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                conn.sock.settimeout(req.timeout)
+            sent = False
+            try:
+                conn.request(method, req.selector, req.data, headers)
+                sent = True
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except STALE_ERRORS as e:
+                conn.close()
+                conn = None
+                # A POST may have reached the server before the reset; never submit it twice.
+                if not reused or attempt or (sent and method not in IDEMPOTENT):
+                    raise urllib.error.URLError(e)
+            except OSError as e:
+                conn.close()
+                raise urllib.error.URLError(e)
+            except Exception:
+                conn.close()
+                raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        out = urllib.response.addinfourl(io.BytesIO(body), resp.msg, req.get_full_url(), resp.status)
+        out.msg = resp.reason
+        return out
+
+
+class PooledHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, pool: ConnectionPool):
+        super().__init__()
+        self.pool = pool
+
+    def http_open(self, req):
+        if req._tunnel_host:
+            return super().http_open(req)
+        return self.pool.open(http.client.HTTPConnection, req)
+
+
+class PooledHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, pool: ConnectionPool):
+        super().__init__()
+        self.pool = pool
+
+    def https_open(self, req):
+        if req._tunnel_host:
+            return super().https_open(req)
+        return self.pool.open(http.client.HTTPSConnection, req, context=self._context)
+
+
+def build_opener(pool: ConnectionPool | None = None):
+    pool = pool or ConnectionPool()
+    return urllib.request.build_opener(PooledHTTPHandler(pool), PooledHTTPSHandler(pool))
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Simulate PanelClient lane assignment and fan-out offline.
+
+Per-target autopilot outcomes (`api/autopilot/run` service events with
+"ok"/"failed" text) are extracted from prompt-history.ndjson and replayed
+through a discrete-event model of runCommutedAutopilot: rank by lane then
+fluency, take the top `max_targets`, skip quarantined or cooling targets,
+run steps sequentially, retune lanes after each step. As in runAutopilot, a
+step within the global cooldown of the last successful run is throttled
+(no call, but the target's own cooldown restarts), so with the profile
+delays fan-out above 1 mostly yields one run per cycle. Targets still
+waiting at the horizon count their open wait. Sweeps over max_targets and
+lane policy parameters run across a process pool.
+
+Policy knobs beyond the app's current behaviour:
+  --probe-every N      give one quarantined target a probe every N cycles
+                       (the app never re-runs a quarantined target on its own)
+  --window N           judge fluency on the last N outcomes instead of all time
+  --global-cooldown 0  what-if: drop runAutopilot's global cooldown
+
+Usage:
+  python3 scripts/lane_sim.py prompt-history.ndjson
+  python3 scripts/lane_sim.py prompt-history.ndjson --max-targets 1,2,3,4,6 --min-primary 55,65,75 --probe-every 0,20 --jobs 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean, median
+
+import manicai_trace
+from analyze_prompt_cadence import load_events, pct
+from manicai_trace import span
+
+# Mirrors DashboardView.CadenceProfile.
+PROFILES = {
+    "Stabilize": {"refresh_sec": 8, "cooldown_sec": 14, "delay_ms": 1500, "fanout": 1},
+    "Throughput": {"refresh_sec": 4, "cooldown_sec": 6, "delay_ms": 700, "fanout": 3},
+    "Deep Work": {"refresh_sec": 14, "cooldown_sec": 24, "delay_ms": 2200, "fanout": 1},
+}
+LANES = ["Primary", "Secondary", "Quarantine"]
+LANE_RANK = {lane: i for i, lane in enumerate(LANES)}
+OUTCOME_ROUTE = "api/autopilot/run"
+REQUEST_ROUTE = "autopilot/run"
+
+_TARGETS: dict[str, dict] = {}
+
+
+def extract_targets(events: list[dict], default_service_sec: float) -> dict[str, dict]:
+    """Per-target outcome sequences and median request->outcome latency."""
+    outcomes: dict[str, list[bool]] = defaultdict(list)
+    service: dict[str, list[float]] = defaultdict(list)
+    pending: dict[str, float] = {}
+    for ev in events:
+        target = ev.get("target")
+        if not target:
+            continue
+        route = ev.get("route", "-")
+        if route == REQUEST_ROUTE:
+            pending[target] = ev.get("ts", 0)
+        elif route == OUTCOME_ROUTE and ev.get("kind") == "service":
+            text = (ev.get("prompt") or "").strip().lower()
+            if not (text.startswith("ok") or text.startswith("failed")):
+                continue
+            outcomes[target].append(text.startswith("ok"))
+            started = pending.pop(target, None)
+            if started is not None and 0 <= ev.get("ts", 0) - started <= 300:
+                service[target].append(ev["ts"] - started)
+    return {
+        t: {"outcomes": seq, "service_sec": median(service[t]) if service[t] else default_service_sec}
+        for t, seq in outcomes.items()
+    }
+
+
+def fluency(stats: dict) -> int:
+    total = stats["success"] + stats["failure"]
+    if total == 0:
+        return 0
+    return int(round(stats["success"] / total * 100))
+
+
+def simulate(targets: dict[str, dict], cfg: dict) -> dict:
+    rng = random.Random(cfg["seed"])
+    horizon = cfg["hours"] * 3600.0
+    state = {}
+    for name in sorted(targets):
+        seq = targets[name]["outcomes"]
+        state[name] = {
+            "lane": "Secondary",
+            "ptr": rng.randrange(len(seq)),
+            "recent": deque(),
+            "ok": 0,
+            # last step (run or throttled) for the per-target cooldown
+            "last_step": None,
+            # end of the last real run, where the next wait starts counting
+            "last_end": None,
+        }
+    global_stats = {"success": 0, "failure": 0}
+
+    def stats_for(name):
+        st = state[name]
+        return {"success": st["ok"], "failure": len(st["recent"]) - st["ok"]}
+
+    def record(name, ok):
+        st = state[name]
+        st["recent"].append(ok)
+        st["ok"] += ok
+        if cfg["window"] and len(st["recent"]) > cfg["window"]:
+            st["ok"] -= st["recent"].popleft()
+
+    def rank_fluency(name):
+        s = stats_for(name)
+        return fluency(s) if s["success"] + s["failure"] else fluency(global_stats)
+
+    def retune(name):
+        s = stats_for(name)
+        if s["success"] + s["failure"] < cfg["min_samples"]:
+            return
+        f = fluency(s)
+        cur = state[name]["lane"]
+        if f < max(20, cfg["min_primary"] - 35) and cur != "Quarantine":
+            new = "Quarantine"
+        elif f >= cfg["min_primary"] and cur != "Primary":
+            new = "Primary"
+        elif 35 <= f < cfg["min_primary"] and cur == "Quarantine":
+            new = "Secondary"
+        else:
+            return
+        if "Quarantine" in (cur, new):
+            churn["into" if new == "Quarantine" else "out"] += 1
+        state[name]["lane"] = new
+
+    completed = defaultdict(int)
+    attempts = defaultdict(int)
+    waits: dict[str, list[float]] = defaultdict(list)
+    churn = {"into": 0, "out": 0}
+    lane_time = defaultdict(float)
+    throttled = 0
+    last_success = None
+
+    def ready_at(st):
+        return 0.0 if st["last_end"] is None else st["last_end"] + cfg["cooldown_sec"]
+
+    t = 0.0
+    cycle = 0
+    while t < horizon:
+        cycle += 1
+        cycle_start = t
+        ranked = sorted(state, key=lambda n: (LANE_RANK[state[n]["lane"]], -rank_fluency(n), n))
+        picks = ranked[: max(1, cfg["max_targets"])]
+        probe = None
+        if cfg["probe_every"] and cycle % cfg["probe_every"] == 0:
+            quarantined = [n for n in state if state[n]["lane"] == "Quarantine"]
+            if quarantined:
+                probe = min(quarantined, key=lambda n: state[n]["last_end"] or 0.0)
+                if probe not in picks:
+                    picks.append(probe)
+
+        for name in picks:
+            st = state[name]
+            if st["lane"] == "Quarantine" and name != probe:
+                continue
+            if st["last_step"] is not None and t - st["last_step"] < cfg["cooldown_sec"]:
+                continue
+            if cfg["global_cooldown"] and last_success is not None and t - last_success < cfg["cooldown_sec"]:
+                throttled += 1
+                st["last_step"] = t
+                t += cfg["delay_ms"] / 1000.0
+                continue
+            lane = st["lane"]
+            waits[lane].append(t - ready_at(st))
+            seq = targets[name]["outcomes"]
+            ok = seq[st["ptr"] % len(seq)]
+            st["ptr"] += 1
+            t += targets[name]["service_sec"]
+            attempts[lane] += 1
+            if ok:
+                completed[lane] += 1
+            record(name, ok)
+            global_stats["success" if ok else "failure"] += 1
+            st["last_step"] = st["last_end"] = t
+            if ok:
+                last_success = t
+            retune(name)
+            t += cfg["delay_ms"] / 1000.0
+        t += cfg["refresh_sec"]
+        for st in state.values():
+            lane_time[st["lane"]] += t - cycle_start
+
+    # Targets never dispatched, or ready again but not yet re-run, are still waiting.
+    waiting = defaultdict(int)
+    for st in state.values():
+        open_wait = t - ready_at(st)
+        if open_wait > 0:
+            waits[st["lane"]].append(open_wait)
+            waiting[st["lane"]] += 1
+
+    hours = t / 3600.0
+    total_lane_time = sum(lane_time.values()) or 1.0
+    return {
+        "work_per_hour": round(sum(completed.values()) / hours, 2),
+        "attempts_per_hour": round(sum(attempts.values()) / hours, 2),
+        "throttled_per_hour": round(throttled / hours, 2),
+        "quarantine_churn_per_hour": round((churn["into"] + churn["out"]) / hours, 3),
+        "quarantined_at_end": sum(1 for st in state.values() if st["lane"] == "Quarantine"),
+        "lanes": {
+            lane: {
+                "completed": completed[lane],
+                "attempts": attempts[lane],
+                "occupancy": round(lane_time[lane] / total_lane_time, 3),
+                "waiting_at_end": waiting[lane],
+                "wait_p50_s": round(pct(waits[lane], 0.5), 1),
+                "wait_p95_s": round(pct(waits[lane], 0.95), 1),
+                "wait_max_s": round(max(waits[lane], default=0.0), 1),
+            }
+            for lane in LANES
+        },
+    }
+
+
+def _init_worker(targets: dict[str, dict]) -> None:
+    global _TARGETS
+    _TARGETS = targets
+
+
+def _run(cfg: dict) -> tuple[dict, dict]:
+    return cfg, simulate(_TARGETS, cfg)
+
+
+def int_list(raw: str) -> list[int]:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
+def aggregate(runs: list[dict]) -> dict:
+    """Mean across seeds; wait tails take the worst seed."""
+    out = {k: round(mean(r[k] for r in runs), 3) for k in ("work_per_hour", "attempts_per_hour", "throttled_per_hour", "quarantine_churn_per_hour", "quarantined_at_end")}
+    out["lanes"] = {
+        lane: {
+            "completed": round(mean(r["lanes"][lane]["completed"] for r in runs), 1),
+            "occupancy": round(mean(r["lanes"][lane]["occupancy"] for r in runs), 3),
+            "waiting_at_end": round(mean(r["lanes"][lane]["waiting_at_end"] for r in runs), 1),
+            "wait_p95_s": max(r["lanes"][lane]["wait_p95_s"] for r in runs),
+            "wait_max_s": max(r["lanes"][lane]["wait_max_s"] for r in runs),
+        }
+        for lane in LANES
+    }
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", help="NDJSON file exported by ManicAI")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="Throughput")
+    ap.add_argument("--max-targets", default="", help="Comma list; default is the profile fanout")
+    ap.add_argument("--min-primary", default="65", help="Comma list of primary-lane fluency thresholds")
+    ap.add_argument("--probe-every", default="0", help="Comma list; 0 keeps the app's absorbing quarantine")
+    ap.add_argument("--window", default="0", help="Comma list; 0 = all-time fluency like APICallStats")
+    ap.add_argument("--global-cooldown", default="1", help="Comma list of 1/0; 0 drops runAutopilot's global cooldown (what-if)")
+    ap.add_argument("--min-samples", type=int, default=3)
+    ap.add_argument("--hours", type=float, default=24.0)
+    ap.add_argument("--seeds", type=int, default=3, help="Replays per combination, each from random sequence offsets")
+    ap.add_argument("--service-sec", type=float, default=8.0, help="Step latency for targets without paired request/outcome events")
+    ap.add_argument("--jobs", type=int, default=0, help="Worker processes (default: CPU count)")
+    ap.add_argument("--json", action="store_true")
+    manicai_trace.add_trace_argument(ap)
+    args = ap.parse_args(argv)
+    manicai_trace.configure("lane_sim", args.trace)
+
+    if args.hours <= 0:
+        ap.error("--hours must be > 0")
+
+    with span("outcomes.extract"):
+        targets = extract_targets(load_events(args.path), args.service_sec)
+    if not targets:
+        print(f"no per-target outcomes found (need {OUTCOME_ROUTE} service events with a target)")
+        return 1
+
+    profile = PROFILES[args.profile]
+    max_targets = int_list(args.max_targets) or [profile["fanout"]]
+    grid = list(
+        itertools.product(max_targets, int_list(args.min_primary), int_list(args.probe_every), int_list(args.window), int_list(args.global_cooldown))
+    )
+    configs = [
+        {
+            "max_targets": mt,
+            "min_primary": mp,
+            "probe_every": pe,
+            "window": w,
+            "global_cooldown": bool(gc),
+            "min_samples": args.min_samples,
+            "hours": args.hours,
+            "seed": seed,
+            "refresh_sec": profile["refresh_sec"],
+            "cooldown_sec": profile["cooldown_sec"],
+            "delay_ms": profile["delay_ms"],
+        }
+        for mt, mp, pe, w, gc in grid
+        for seed in range(args.seeds)
+    ]
+
+    by_combo: dict[tuple, list[dict]] = defaultdict(list)
+    with span("sweep", runs=len(configs)):
+        with ProcessPoolExecutor(max_workers=args.jobs or None, initializer=_init_worker, initargs=(targets,)) as pool:
+            for cfg, result in pool.map(_run, configs):
+                key = (cfg["max_targets"], cfg["min_primary"], cfg["probe_every"], cfg["window"], cfg["global_cooldown"])
+                by_combo[key].append(result)
+
+    rows = []
+    for (mt, mp, pe, w, gc), runs in by_combo.items():
+        row = {"max_targets": mt, "min_primary": mp, "probe_every": pe, "window": w, "global_cooldown": gc}
+        row.update(aggregate(runs))
+        rows.append(row)
+    rows.sort(key=lambda r: r["work_per_hour"], reverse=True)
+
+    if args.json:
+        print(json.dumps({"profile": args.profile, "targets": len(targets), "results": rows}, indent=2))
+        return 0
+
+    print(f"profile={args.profile} targets={len(targets)} hours={args.hours:g} seeds={args.seeds}")
+    print("max_targets min_primary probe_every window gcd | work/h thr/h churn/h q_end | wait_p95 P/S/Q (s)")
+    for r in rows:
+        lanes = r["lanes"]
+        waits = "/".join(f"{lanes[lane]['wait_p95_s']:.0f}" for lane in LANES)
+        print(
+            f"{r['max_targets']:>11} {r['min_primary']:>11} {r['probe_every']:>11} {r['window']:>6} {int(r['global_cooldown']):>3} | "
+            f"{r['work_per_hour']:>6.1f} {r['throttled_per_hour']:>5.1f} {r['quarantine_churn_per_hour']:>7.2f} {r['quarantined_at_end']:>5.1f} | {waits}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Single entry point for the ManicAI operator scripts.
+
+Each subcommand imports its script lazily and calls its main(), so a
+one-shot run pays only for the tool it uses. `serve` keeps the tools
+resident instead of forking an interpreter per cron job: HTTP connections
+are pooled across runs, state snapshot reads are cached until the file
+changes, and the cadence jobs from install_cron.sh run on an internal
+schedule.
+
+Usage:
+  scripts/manicai-tools validate --base http://173.212.203.211:8788
+  scripts/manicai-tools cadence prompt-history.ndjson
+  scripts/manicai-tools snapshot http://173.212.203.211:8788
+  scripts/manicai-tools serve --base http://173.212.203.211:8788
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_BASE = "http://173.212.203.211:8788"
+
+# subcommand -> (module, help)
+COMMANDS = {
+    "validate": ("validate_control_plane", "Validate control-plane endpoint contracts"),
+    "scan": ("surfaces.scan_live_surfaces", "Scan live surfaces"),
+    "snapshot": (None, "Write logs/snapshots/state-<day>.json from /api/state"),
+    "drift": ("cadence.weekly_benchmark_drift", "Diff the two newest state snapshots"),
+    "cadence": ("analyze_prompt_cadence", "Prompt cadence stats from NDJSON history"),
+    "playtest": ("playtests.coggy_playtest", "Coggy promptset + OpenRouter free model playtest"),
+    "timeline": ("timeline_index", "Multi-resolution timeline index"),
+    "dupes": ("prompt_dupes", "Near-duplicate prompt loop index"),
+    "replay": ("replay_control_plane", "Replay recorded traffic against a control plane"),
+    "lanes": ("lane_sim", "Offline lane-assignment simulator"),
+}
+
+
+def load_module(name: str):
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    return importlib.import_module(name)
+
+
+def snapshot_main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="manicai-tools snapshot")
+    ap.add_argument("base", nargs="?", default=DEFAULT_BASE)
+    args = ap.parse_args(argv)
+
+    request = load_module("validate_control_plane").request
+    status, body = request(args.base.rstrip("/") + "/api/state", timeout=20)
+    if status != 200:
+        print(f"[daily-snapshot] /api/state failed: status={status} {body[:180]}")
+        return 1
+    snap_dir = os.path.join(ROOT, "logs", "snapshots")
+    os.makedirs(snap_dir, exist_ok=True)
+    out = os.path.join(snap_dir, f"state-{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(body)
+    print(f"[daily-snapshot] wrote {out}")
+    return 0
+
+
+def run_command(cmd: str, argv: list[str]) -> int:
+    module, _ = COMMANDS[cmd]
+    main = snapshot_main if module is None else load_module(module).main
+    try:
+        return main(argv) or 0
+    except SystemExit as e:
+        if isinstance(e.code, int) or e.code is None:
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    finally:
+        # Tracing is per script run; in-process reruns under `serve` each get their own file.
+        load_module("manicai_trace").finish()
+
+
+# Resident mode -------------------------------------------------------------
+
+def cache_by_mtime(fn):
+    """Memoize a single-path loader until the file's mtime or size changes."""
+    cache: dict[str, tuple[tuple[int, int], object]] = {}
+
+    def wrapper(path, *args, **kwargs):
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        hit = cache.get(path)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        value = fn(path, *args, **kwargs)
+        cache[path] = (stamp, value)
+        return value
+
+    return wrapper
+
+
+def make_resident() -> None:
+    """Pool HTTP connections and cache snapshot reads for in-process reruns."""
+    import urllib.request
+
+    import http_pool
+
+    urllib.request.install_opener(http_pool.build_opener())
+    drift = load_module("cadence.weekly_benchmark_drift")
+    drift.load = cache_by_mtime(drift.load)
+
+
+class Tee:
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, text: str) -> int:
+        for stream in self.streams:
+            stream.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        for stream in self.streams:
+            stream.flush()
+
+
+def next_run(job: dict, now: datetime) -> datetime:
+    if "every" in job:
+        return now + timedelta(seconds=job["every"])
+    hh, mm = (int(x) for x in job["at"].split(":"))
+    due = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    while due <= now or ("weekday" in job and due.weekday() != job["weekday"]):
+        due += timedelta(days=1)
+    return due
+
+
+def run_with_run_log(job: dict, base: str, log_dir: str, log) -> int:
+    """Tee a job's stdout into its own <name>-<ts>.log, as feed_health_check.sh does."""
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%SZ")
+    out = os.path.join(log_dir, f"{job['name']}-{ts}.log")
+    argv = [a.replace("{base}", base) for a in job["argv"]]
+    with open(out, "w", encoding="utf-8") as run_log, contextlib.redirect_stdout(Tee(log, run_log)):
+        print(f"[{job['name']}] ts={ts} base={base}")
+        code = run_command(job["cmd"], argv)
+    if code == 0:
+        print(f"[{job['name']}] wrote {out}")
+    return code
+
+
+def run_job(job: dict, base: str) -> None:
+    log_dir = os.path.join(ROOT, "logs", "cadence")
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, job["log"]), "a", encoding="utf-8") as log:
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            print(f"[serve] {datetime.now(timezone.utc).isoformat()} job={job['name']}")
+            try:
+                if job["cmd"] == "wrangle":
+                    import subprocess
+
+                    script = os.path.join(SCRIPTS_DIR, "cadence", "wrangle_logs.sh")
+                    env = dict(os.environ, KEEP_DAYS="14", MAX_MB="256")
+                    log.flush()
+                    code = subprocess.run([script], cwd=ROOT, env=env, stdout=log, stderr=log).returncode
+                elif job.get("run_log"):
+                    code = run_with_run_log(job, base, log_dir, log)
+                else:
+                    argv = [a.replace("{base}", base) for a in job["argv"]]
+                    code = run_command(job["cmd"], argv)
+            except Exception as e:  # noqa: BLE001
+                code = 1
+                print(f"[serve] job={job['name']} crashed: {type(e).__name__}: {e}")
+            print(f"[serve] job={job['name']} exit={code}")
+
+
+def serve_main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="manicai-tools serve")
+    ap.add_argument("--base", default=DEFAULT_BASE)
+    ap.add_argument("--run-now", action="store_true", help="Run every job once at startup")
+    args = ap.parse_args(argv)
+    base = args.base.rstrip("/")
+
+    # Same jobs and log files as install_cron.sh (times are UTC).
+    jobs = [
+        {"name": "feed-health", "every": 900, "cmd": "validate", "argv": ["--base", "{base}"], "log": "cron-feed-health.log", "run_log": True},
+        {"name": "daily-snapshot", "at": "01:05", "cmd": "snapshot", "argv": ["{base}"], "log": "cron-daily-snapshot.log"},
+        {"name": "weekly-drift", "at": "02:10", "weekday": 0, "cmd": "drift", "argv": [], "log": "cron-weekly-drift.log"},
+        {"name": "log-wrangle", "at": "02:25", "cmd": "wrangle", "argv": [], "log": "cron-log-wrangle.log"},
+    ]
+    os.chdir(ROOT)
+    make_resident()
+
+    now = datetime.now(timezone.utc)
+    for job in jobs:
+        job["due"] = now if args.run_now else next_run(job, now)
+    print(f"[serve] base={base} jobs={','.join(j['name'] for j in jobs)}", flush=True)
+    try:
+        while True:
+            job = min(jobs, key=lambda j: j["due"])
+            wait = (job["due"] - datetime.now(timezone.utc)).total_seconds()
+            if wait > 0:
+                time.sleep(min(wait, 60))
+                continue
+            run_job(job, base)
+            job["due"] = next_run(job, datetime.now(timezone.utc))
+            print(f"[serve] ran {job['name']}; next at {job['due'].isoformat()}", flush=True)
+    except KeyboardInterrupt:
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print("usage: manicai-tools <command> [args...]\n\ncommands:")
+        for name, (_, help_text) in COMMANDS.items():
+            print(f"  {name:<10} {help_text}")
+        print(f"  {'serve':<10} Keep tools resident and run the cadence jobs on a schedule")
+        return 0 if argv else 2
+    cmd, rest = argv[0], argv[1:]
+    if cmd == "serve":
+        return serve_main(rest)
+    if cmd not in COMMANDS:
+        print(f"unknown command: {cmd} (see manicai-tools --help)", file=sys.stderr)
+        return 2
+    sys.argv[0] = f"manicai-tools {cmd}"
+    return run_command(cmd, rest)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Lightweight span tracing shared by the ManicAI scripts.
+
+Tracing is off unless a script is run with `--trace [PATH]` or with
+`MANICAI_TRACE` set (`1` for the default path, anything else is used as the
+output path). When enabled, spans are written as Chrome trace-event JSON
+(load in chrome://tracing or https://ui.perfetto.dev) and a top-N hot-span
+summary is printed to stderr on exit. While enabled, DNS lookups and TCP
+connects are recorded as their own spans so HTTP time splits into
+dns / connect / server+transfer.
+
+When disabled, `span()` returns a shared no-op context manager.
+
+Usage:
+  python3 scripts/validate_control_plane.py --base http://... --trace
+  MANICAI_TRACE=/tmp/scan.json python3 scripts/surfaces/scan_live_surfaces.py
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+TRACE_ENV = "MANICAI_TRACE"
+TOP_ENV = "MANICAI_TRACE_TOP"
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DIR = ROOT / "logs" / "traces"
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "t0", "child_us")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.t0 = 0
+        self.child_us = 0.0
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        dur_us = (time.perf_counter_ns() - self.t0) / 1000.0
+        stack = self.tracer._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child_us += dur_us
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self, dur_us)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class Tracer:
+    def __init__(self, name: str, path: Path, top: int):
+        self.name = name
+        self.path = path
+        self.top = top
+        self.pid = os.getpid()
+        self.origin_ns = time.perf_counter_ns()
+        self.events: list[dict] = []
+        self.totals: dict[str, list[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, sp: _Span, dur_us: float) -> None:
+        ev = {
+            "name": sp.name,
+            "cat": sp.cat,
+            "ph": "X",
+            "ts": (sp.t0 - self.origin_ns) / 1000.0,
+            "dur": dur_us,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if sp.args:
+            ev["args"] = sp.args
+        with self._lock:
+            self.events.append(ev)
+            agg = self.totals[sp.name]
+            agg[0] += 1
+            agg[1] += dur_us
+            agg[2] += max(0.0, dur_us - sp.child_us)
+            agg[3] = max(agg[3], dur_us)
+
+    def hot_spans(self) -> list[dict]:
+        rows = [
+            {
+                "name": name,
+                "count": int(n),
+                "total_ms": round(total / 1000.0, 3),
+                "self_ms": round(self_us / 1000.0, 3),
+                "max_ms": round(peak / 1000.0, 3),
+            }
+            for name, (n, total, self_us, peak) in self.totals.items()
+        ]
+        rows.sort(key=lambda r: r["self_ms"], reverse=True)
+        return rows[: self.top]
+
+    def write(self) -> Path:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        meta = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.name}},
+        ]
+        doc = {"traceEvents": meta + self.events, "displayTimeUnit": "ms", "otherData": {"hot_spans": self.hot_spans()}}
+        self.path.write_text(json.dumps(doc), encoding="utf-8")
+        return self.path
+
+
+_tracer: Tracer | None = None
+_atexit_registered = False
+_orig_getaddrinfo = socket.getaddrinfo
+_orig_create_connection = socket.create_connection
+
+
+def _traced_getaddrinfo(host, port, *args, **kwargs):
+    with span("dns", cat="net", host=str(host)):
+        return _orig_getaddrinfo(host, port, *args, **kwargs)
+
+
+def _traced_create_connection(address, *args, **kwargs):
+    with span("connect", cat="net", host=str(address[0]), port=address[1]):
+        return _orig_create_connection(address, *args, **kwargs)
+
+
+def add_trace_argument(ap) -> None:
+    ap.add_argument(
+        "--trace",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help=f"Write Chrome trace-event JSON (default under logs/traces/); also enabled by {TRACE_ENV}",
+    )
+
+
+def configure(name: str, trace: str | None = None) -> bool:
+    """Enable tracing if `trace` (from --trace) or MANICAI_TRACE asks for it."""
+    global _tracer, _atexit_registered
+    if trace is None:
+        env = os.environ.get(TRACE_ENV, "").strip()
+        if not env or env == "0":
+            return False
+        trace = "" if env == "1" else env
+    if _tracer is not None:
+        return True
+    if trace:
+        path = Path(trace)
+    else:
+        ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%SZ")
+        path = DEFAULT_DIR / f"{name}-{ts}.trace.json"
+    try:
+        top = int(os.environ.get(TOP_ENV, "15"))
+    except ValueError:
+        top = 15
+    _tracer = Tracer(name, path, top)
+    socket.getaddrinfo = _traced_getaddrinfo
+    socket.create_connection = _traced_create_connection
+    if not _atexit_registered:
+        atexit.register(finish)
+        _atexit_registered = True
+    return True
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, cat: str = "script", **args):
+    if _tracer is None:
+        return _NOOP
+    return _Span(_tracer, name, cat, args)
+
+
+def finish() -> Path | None:
+    """Write the trace and print the hot-span summary. Safe to call twice."""
+    global _tracer
+    tracer = _tracer
+    if tracer is None:
+        return None
+    _tracer = None
+    socket.getaddrinfo = _orig_getaddrinfo
+    socket.create_connection = _orig_create_connection
+    path = tracer.write()
+    print(f"[trace] wrote {path}", file=sys.stderr)
+    print(f"[trace] top {tracer.top} spans by self time:", file=sys.stderr)
+    for r in tracer.hot_spans():
+        print(
+            f"  {r['name']:<28} n={r['count']:<5} self={r['self_ms']:>10.2f}ms total={r['total_ms']:>10.2f}ms max={r['max_ms']:>9.2f}ms",
+            file=sys.stderr,
+        )
+    return path
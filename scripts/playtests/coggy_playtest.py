@@ -4,6 +4,7 @@ import glob
 import json
 import os
 import re
+import sys
 import time
 import urllib.error
 import urllib.parse
@@ -11,6 +12,10 @@ import urllib.request
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import manicai_trace  # noqa: E402
+from manicai_trace import span  # noqa: E402
+
 DEFAULT_COGGY_BASE = "http://173.212.203.211:8421"
 
 PROMPTSET = [
@@ -31,9 +36,14 @@ def http_json(url, method="GET", payload=None, headers=None, timeout=20):
         data = json.dumps(payload).encode("utf-8")
         req_headers["Content-Type"] = "application/json"
     req = urllib.request.Request(url, data=data, headers=req_headers, method=method)
-    with urllib.request.urlopen(req, timeout=timeout) as resp:
-        raw = resp.read().decode("utf-8", errors="replace")
-        return json.loads(raw)
+    with span("http", cat="net", method=method, url=url):
+        with span("http.open", cat="net"):
+            resp = urllib.request.urlopen(req, timeout=timeout)
+        with resp:
+            with span("http.read", cat="net"):
+                raw = resp.read().decode("utf-8", errors="replace")
+        with span("json.parse", bytes=len(raw)):
+            return json.loads(raw)
 
 
 def discover_coggy_ports(coggy_dir):
@@ -123,7 +133,8 @@ def probe_openrouter_free_models(key, sample_models):
             "temperature": 0,
         }
         try:
-            out = http_json("https://openrouter.ai/api/v1/chat/completions", method="POST", payload=payload, headers=headers, timeout=25)
+            with span("openrouter.probe", model=model):
+                out = http_json("https://openrouter.ai/api/v1/chat/completions", method="POST", payload=payload, headers=headers, timeout=25)
             elapsed = int((time.time() - started) * 1000)
             content = ""
             choices = out.get("choices") or []
@@ -156,7 +167,8 @@ def run_coggy_promptset(base_url):
         started = time.time()
         row = {"prompt_id": name, "ok": False, "latency_ms": None}
         try:
-            out = http_json(f"{base_url}/api/chat", method="POST", payload={"message": prompt}, timeout=30)
+            with span("coggy.prompt", prompt_id=name):
+                out = http_json(f"{base_url}/api/chat", method="POST", payload={"message": prompt}, timeout=30)
             elapsed = int((time.time() - started) * 1000)
             trace = out.get("trace") or {}
             row.update({
@@ -251,13 +263,15 @@ def write_markdown(path, report):
     Path(path).write_text(out, encoding="utf-8")
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--coggy-dir", default="/home/uprootiny/coggy")
     parser.add_argument("--coggy-base", default=os.environ.get("MANICAI_COGGY_BASE", DEFAULT_COGGY_BASE))
     parser.add_argument("--out-dir", default=".")
     parser.add_argument("--sample-models", type=int, default=3)
-    args = parser.parse_args()
+    manicai_trace.add_trace_argument(parser)
+    args = parser.parse_args(argv)
+    manicai_trace.configure("coggy_playtest", args.trace)
 
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%SZ")
     out_dir = Path(args.out_dir).resolve()
@@ -266,23 +280,26 @@ def main():
     logs_dir.mkdir(parents=True, exist_ok=True)
     docs_dir.mkdir(parents=True, exist_ok=True)
 
-    ports = discover_coggy_ports(args.coggy_dir)
-    port = None
-    base_url = normalize_base_url(args.coggy_base)
-    if base_url and not is_healthy_base(base_url):
-        base_url = ""
-    if not base_url:
-        port = first_healthy_port(ports)
-        if not port:
-            raise SystemExit("No healthy Coggy endpoint detected")
-        base_url = f"http://127.0.0.1:{port}"
+    with span("coggy.discover"):
+        ports = discover_coggy_ports(args.coggy_dir)
+        port = None
+        base_url = normalize_base_url(args.coggy_base)
+        if base_url and not is_healthy_base(base_url):
+            base_url = ""
+        if not base_url:
+            port = first_healthy_port(ports)
+            if not port:
+                raise SystemExit("No healthy Coggy endpoint detected")
+            base_url = f"http://127.0.0.1:{port}"
     if port is None:
         parsed = urllib.parse.urlparse(base_url)
         port = parsed.port
 
-    promptset = run_coggy_promptset(base_url)
+    with span("coggy.promptset"):
+        promptset = run_coggy_promptset(base_url)
     key = read_openrouter_key(args.coggy_dir)
-    openrouter = probe_openrouter_free_models(key, args.sample_models)
+    with span("openrouter.free_models"):
+        openrouter = probe_openrouter_free_models(key, args.sample_models)
 
     report = {
         "timestamp": ts,
@@ -298,9 +315,10 @@ def main():
     md_path = docs_dir / f"coggy-playtest-{ts}.md"
     latest_path = docs_dir / "coggy-playtest-latest.md"
 
-    json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
-    write_markdown(md_path, report)
-    write_markdown(latest_path, report)
+    with span("report.write"):
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        write_markdown(md_path, report)
+        write_markdown(latest_path, report)
 
     print(f"PLAYTEST_JSON={json_path}")
     print(f"PLAYTEST_MD={md_path}")
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Find near-duplicate prompt loops in ManicAI prompt history.
+
+Only operator prompts are indexed: service outcomes (`api/...` routes, "ok"
+/ "failed: ...") and git/file artifacts (`artifact/...`) are skipped. The
+event kind is not used, since the app classifies prompts mentioning commits
+or files as `git`/`file` too. Prompts are normalized, shingled and
+MinHashed; LSH banding turns the signatures into bucket keys, so each new
+prompt is only compared with the few prompts sharing a band instead of with
+every prompt seen so far.
+Identical prompts collapse to one entry before hashing. Candidates whose
+estimated Jaccard similarity clears --threshold are merged into clusters,
+and clusters are reported per target and route with repeat counts and
+first/last timestamps.
+
+`update` is incremental: only lines appended since the last run are hashed.
+
+Usage:
+  python3 scripts/prompt_dupes.py update prompt-history.ndjson
+  python3 scripts/prompt_dupes.py report --min-repeats 5
+  python3 scripts/prompt_dupes.py report --target host:1 --route pane/send --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+from array import array
+from collections import defaultdict
+from pathlib import Path
+
+import manicai_trace
+from manicai_trace import span
+from timeline_index import HistoryCursor, event_key
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_INDEX = ROOT / "logs" / "dupes" / "prompt-dupes-index.json"
+INDEX_VERSION = 2
+MERSENNE = (1 << 61) - 1
+WORD_RE = re.compile(r"\w+")
+DIGITS_RE = re.compile(r"\d+")
+STATUS_ROUTE_PREFIXES = ("api/", "artifact/")
+
+
+def normalize(text: str) -> str:
+    return DIGITS_RE.sub("0", " ".join(text.lower().split()))
+
+
+def shingles(norm: str, width: int = 3) -> set[int]:
+    """Word 3-grams, or character 4-grams for prompts shorter than that."""
+    words = WORD_RE.findall(norm)
+    if len(words) >= width:
+        grams = (" ".join(words[i : i + width]) for i in range(len(words) - width + 1))
+    else:
+        grams = (norm[i : i + 4] for i in range(max(1, len(norm) - 3)))
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") % MERSENNE for g in grams}
+
+
+def first_ts(history: Path) -> float:
+    with history.open("rb") as f:
+        for raw in f:
+            try:
+                return float(json.loads(raw).get("ts", 0) or 0)
+            except (json.JSONDecodeError, AttributeError):
+                continue
+    return 0.0
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, seed: int):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.randrange(1, MERSENNE), rng.randrange(0, MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, hashes: set[int]) -> array:
+        if not hashes:
+            return array("Q", [MERSENNE] * self.num_perm)
+        return array("Q", [min((a * x + b) % MERSENNE for x in hashes) for a, b in self.params])
+
+
+class DupeIndex:
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        self.hasher = MinHasher(num_perm, seed)
+        self.cursor = HistoryCursor()
+        # id -> ts for events in the history file's current contents
+        self.recent_ids: dict[str, float] = {}
+        # one entry per distinct normalized prompt
+        self.docs: list[dict] = []
+        self.sigs: list[array] = []
+        self.parent: list[int] = []
+        self.by_text: dict[str, int] = {}
+        self.buckets: dict[bytes, list[int]] = defaultdict(list)
+
+    @classmethod
+    def load(cls, path: Path, **params) -> "DupeIndex":
+        if not path.exists():
+            return cls(**params)
+        with span("index.load", path=str(path)):
+            doc = json.loads(path.read_text(encoding="utf-8"))
+        if doc.get("version") != INDEX_VERSION:
+            return cls(**params)
+        idx = cls(doc["num_perm"], doc["bands"], doc["seed"])
+        idx.cursor = HistoryCursor.from_dict(doc.get("cursor") or {})
+        idx.recent_ids = dict(doc.get("recent_ids") or {})
+        idx.parent = list(doc.get("parent") or [])
+        for i, d in enumerate(doc.get("docs") or []):
+            sig = array("Q")
+            sig.frombytes(base64.b64decode(d.pop("sig")))
+            idx.docs.append(d)
+            idx.sigs.append(sig)
+            idx.by_text[d["h"]] = i
+            for key in idx._band_keys(sig):
+                idx.buckets[key].append(i)
+        return idx
+
+    def save(self, path: Path) -> None:
+        doc = {
+            "version": INDEX_VERSION,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "seed": self.seed,
+            "cursor": self.cursor.to_dict(),
+            "recent_ids": self.recent_ids,
+            "parent": self.parent,
+            "docs": [dict(d, sig=base64.b64encode(s.tobytes()).decode("ascii")) for d, s in zip(self.docs, self.sigs)],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with span("index.save", path=str(path)):
+            tmp.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def _band_keys(self, sig: array) -> list[bytes]:
+        r = self.rows
+        return [bytes([b]) + hashlib.blake2b(sig[b * r : (b + 1) * r].tobytes(), digest_size=8).digest() for b in range(self.bands)]
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def _union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    def similarity(self, a: int, b: int) -> float:
+        sa, sb = self.sigs[a], self.sigs[b]
+        return sum(1 for x, y in zip(sa, sb) if x == y) / self.num_perm
+
+    def insert(self, ev: dict, threshold: float) -> bool:
+        prompt = (ev.get("prompt") or "").strip()
+        if not prompt or (ev.get("route") or "").strip("/").startswith(STATUS_ROUTE_PREFIXES):
+            return False
+        norm = normalize(prompt)
+        h = hashlib.sha1(norm.encode("utf-8")).hexdigest()
+        i = self.by_text.get(h)
+        if i is None:
+            i = len(self.docs)
+            sig = self.hasher.signature(shingles(norm))
+            self.docs.append({"h": h, "p": prompt[:200], "n": 0, "occ": {}})
+            self.sigs.append(sig)
+            self.parent.append(i)
+            self.by_text[h] = i
+            checked = set()
+            for key in self._band_keys(sig):
+                bucket = self.buckets[key]
+                for j in bucket:
+                    if j in checked:
+                        continue
+                    checked.add(j)
+                    # already merged through another member of j's cluster
+                    if self.find(j) == self.find(i):
+                        continue
+                    if self.similarity(i, j) >= threshold:
+                        self._union(i, j)
+                bucket.append(i)
+
+        ts = float(ev.get("ts", 0) or 0)
+        d = self.docs[i]
+        d["n"] += 1
+        key = f"{ev.get('target') or '-'}|{ev.get('route', '-')}"
+        occ = d["occ"].get(key)
+        if occ is None:
+            d["occ"][key] = [1, ts, ts]
+        else:
+            occ[0] += 1
+            occ[1] = min(occ[1], ts)
+            occ[2] = max(occ[2], ts)
+        return True
+
+    def update_from(self, history: Path, threshold: float) -> int:
+        added = 0
+        with span("history.ingest", start=self.cursor.offset) as sp:
+            previous = self.recent_ids
+            current: dict[str, float] = {}
+            for ev in self.cursor.read(history):
+                eid = event_key(ev)
+                current[eid] = float(ev.get("ts", 0) or 0)
+                if self.cursor.rescanned and eid in previous:
+                    continue
+                if self.insert(ev, threshold):
+                    added += 1
+            # Only ids still in the file are needed to dedupe the next rewrite;
+            # the app's ring buffer drops events older than its first line.
+            if self.cursor.rescanned:
+                self.recent_ids = current
+            else:
+                oldest = first_ts(history)
+                self.recent_ids = {k: ts for k, ts in {**previous, **current}.items() if ts >= oldest}
+            sp.set(added=added, rescan=self.cursor.rescanned, distinct=len(self.docs))
+        return added
+
+    def clusters(self, min_repeats: int, target: str = "", route: str = "") -> list[dict]:
+        members: dict[int, list[int]] = defaultdict(list)
+        for i in range(len(self.docs)):
+            members[self.find(i)].append(i)
+
+        out = []
+        for root, ids in members.items():
+            groups: dict[str, list] = {}
+            for i in ids:
+                for key, (n, first, last) in self.docs[i]["occ"].items():
+                    g = groups.setdefault(key, [0, first, last])
+                    g[0] += n
+                    g[1] = min(g[1], first)
+                    g[2] = max(g[2], last)
+            rows = []
+            for key, (n, first, last) in groups.items():
+                t, r = key.split("|", 1)
+                if (target and t != target) or (route and r != route):
+                    continue
+                rows.append({"target": t, "route": r, "repeats": n, "first_ts": first, "last_ts": last})
+            total = sum(r["repeats"] for r in rows)
+            if not rows or total < min_repeats:
+                continue
+            rows.sort(key=lambda r: r["repeats"], reverse=True)
+            top = max(ids, key=lambda i: self.docs[i]["n"])
+            out.append(
+                {
+                    "cluster": root,
+                    "prompt": self.docs[top]["p"],
+                    "variants": len(ids),
+                    "repeats": total,
+                    "first_ts": min(r["first_ts"] for r in rows),
+                    "last_ts": max(r["last_ts"] for r in rows),
+                    "by_target_route": rows,
+                }
+            )
+        out.sort(key=lambda c: c["repeats"], reverse=True)
+        return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--index", default=str(DEFAULT_INDEX), help="Index JSON path")
+    # --trace sits on each subcommand so a bare `--trace` cannot swallow the command name
+    common = argparse.ArgumentParser(add_help=False)
+    manicai_trace.add_trace_argument(common)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    up = sub.add_parser("update", help="Hash new lines from prompt-history.ndjson", parents=[common])
+    up.add_argument("history", help="NDJSON file exported by ManicAI")
+    up.add_argument("--threshold", type=float, default=0.7, help="Estimated Jaccard needed to merge prompts")
+    up.add_argument("--num-perm", type=int, default=64, help="MinHash permutations (new index only)")
+    up.add_argument("--bands", type=int, default=16, help="LSH bands (new index only)")
+
+    rep = sub.add_parser("report", help="List loop clusters", parents=[common])
+    rep.add_argument("--min-repeats", type=int, default=3)
+    rep.add_argument("--target", default="")
+    rep.add_argument("--route", default="")
+    rep.add_argument("--top", type=int, default=20)
+    rep.add_argument("--json", action="store_true")
+
+    args = ap.parse_args(argv)
+    manicai_trace.configure("prompt_dupes", args.trace)
+    index_path = Path(args.index)
+
+    if args.cmd == "update":
+        idx = DupeIndex.load(index_path, num_perm=args.num_perm, bands=args.bands)
+        added = idx.update_from(Path(args.history), args.threshold)
+        idx.save(index_path)
+        print(f"[prompt-dupes] added={added} distinct={len(idx.docs)} offset={idx.cursor.offset}")
+        print(f"[prompt-dupes] wrote {index_path}")
+        return 0
+
+    idx = DupeIndex.load(index_path)
+    with span("report.clusters"):
+        clusters = idx.clusters(args.min_repeats, args.target, args.route)[: args.top]
+    if args.json:
+        print(json.dumps(clusters, indent=2))
+        return 0
+    if not clusters:
+        print("no loop clusters found")
+        return 0
+    for c in clusters:
+        print(f"- cluster {c['cluster']}: repeats={c['repeats']} variants={c['variants']} span={c['last_ts'] - c['first_ts']:.0f}s")
+        print(f"  prompt: {c['prompt'][:100]}")
+        for r in c["by_target_route"]:
+            print(f"  {r['target']} {r['route']}: n={r['repeats']} first={r['first_ts']:.0f} last={r['last_ts']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Replay recorded operator traffic against a control plane, open-loop.
+
+The app writes one `service` event per mutation call (route `api/...`, text
+"ok" or "failed: ..."); those are mapped onto the validator's ROUTES and
+re-issued at the recorded cadence (optionally compressed N x). Prompt events
+that accompany a mutation are skipped so each call replays once.
+
+`/api/state` is only sampled: the app polls every 4-14s (the cadence
+profile's refresh interval) and after every successful mutation, but logs a
+successful refresh at most every 30s. Those polls are synthesized back in at
+--state-poll-sec (default: the --profile refresh interval; 0 replays only the
+logged events).
+
+Dispatch never waits on completions; a bounded worker pool executes calls,
+and latency is measured from the intended send time so queueing shows up.
+
+Usage:
+  python3 scripts/replay_control_plane.py prompt-history.ndjson --stand-in --speed 60
+  python3 scripts/replay_control_plane.py prompt-history.ndjson --base http://... --speed 10
+  python3 scripts/replay_control_plane.py prompt-history.ndjson --base http://... --probe-post --workers 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import manicai_trace
+from analyze_prompt_cadence import load_events, pct
+from lane_sim import PROFILES
+from manicai_trace import span
+from validate_control_plane import ROUTES, discover_samples, request, sample_payloads
+
+ROUTE_BY_HISTORY = {path[len("/api/"):]: (rid, method, path) for rid, method, path, _ in ROUTES}
+# PanelClient.shouldRecordStateServiceEvent: successful refreshes are logged at most this often.
+STATE_SAMPLE_SEC = 30.0
+
+
+def map_route(route: str):
+    key = (route or "").strip("/")
+    if not key.startswith("api/"):
+        return None
+    return ROUTE_BY_HISTORY.get(key[len("api/"):])
+
+
+def state_polls(events: list[dict], poll_sec: float) -> list[float]:
+    """Timestamps of the /api/state polls the app made but did not log.
+
+    A successful refresh is logged at most once per STATE_SAMPLE_SEC, so
+    recorded `api/state` events are a sample of the timer-driven polls: gaps
+    short enough to be sampling (app up and polling, allowing one late poll)
+    are refilled every `poll_sec`. Every successful mutation is also
+    followed by a refresh.
+    """
+    out = []
+    prev_state = None
+    for ev in events:
+        mapped = map_route(ev.get("route", "-")) if ev.get("kind") == "service" else None
+        if mapped is None:
+            continue
+        ts = float(ev.get("ts", 0) or 0)
+        if mapped[0] == "state":
+            if prev_state is not None and ts - prev_state <= STATE_SAMPLE_SEC + 2 * poll_sec:
+                t = prev_state + poll_sec
+                while t < ts:
+                    out.append(t)
+                    t += poll_sec
+            prev_state = ts
+        elif mapped[1] == "POST" and (ev.get("prompt") or "").strip().lower().startswith("ok"):
+            out.append(ts)
+    return out
+
+
+def build_plan(events: list[dict], speed: float, max_idle: float, allow_post: bool, poll_sec: float = 0.0):
+    """Return ([(offset_sec, rid, method, path)], skipped-by-reason counts, synthesized state polls)."""
+    calls = []
+    skipped: dict[str, int] = defaultdict(int)
+    for ev in events:
+        kind = ev.get("kind") or "prompt"
+        if kind != "service":
+            skipped[f"{kind}_event"] += 1
+            continue
+        mapped = map_route(ev.get("route", "-"))
+        if mapped is None:
+            skipped[f"unmapped:{ev.get('route', '-')}"] += 1
+            continue
+        if mapped[1] == "POST" and not allow_post:
+            skipped["post_disabled"] += 1
+            continue
+        calls.append((float(ev.get("ts", 0) or 0), *mapped))
+    polls = state_polls(events, poll_sec) if poll_sec > 0 else []
+    state = ROUTE_BY_HISTORY["state"]
+    calls.extend((ts, *state) for ts in polls)
+    calls.sort(key=lambda c: c[0])
+
+    plan = []
+    offset = 0.0
+    prev_ts = None
+    for ts, rid, method, path in calls:
+        if prev_ts is not None:
+            gap = max(0.0, ts - prev_ts)
+            if max_idle > 0:
+                gap = min(gap, max_idle)
+            offset += gap / speed
+        prev_ts = ts
+        plan.append((offset, rid, method, path))
+    return plan, dict(skipped), len(polls)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local control-plane stand-in with fixed latency and a concurrency cap."""
+
+    latency_s = 0.04
+    capacity = 8
+    _inflight = 0
+    _lock = threading.Lock()
+    _paths = {path for _, _, path, _ in ROUTES}
+    _state = json.dumps(
+        {
+            "projects": [{"path": "/srv/stand-in"}],
+            "sessions": [{"id": "stand-in"}],
+            "takeover_candidates": [{"target": "stand-in:0.0"}],
+            "smoke": {"status": "pass"},
+        }
+    ).encode("utf-8")
+
+    def _serve(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        cls = type(self)
+        with cls._lock:
+            cls._inflight += 1
+            over = cls._inflight > cls.capacity
+        try:
+            if self.path not in cls._paths:
+                code, body = 404, b'{"error":"not found"}'
+            elif over:
+                code, body = 503, b'{"error":"overloaded"}'
+            else:
+                time.sleep(cls.latency_s)
+                code, body = 200, cls._state if self.path == "/api/state" else b'{"ok":true}'
+        finally:
+            with cls._lock:
+                cls._inflight -= 1
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _serve
+    do_POST = _serve
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in(latency_ms: float, capacity: int) -> tuple[ThreadingHTTPServer, str]:
+    StandInHandler.latency_s = max(0.0, latency_ms) / 1000.0
+    StandInHandler.capacity = max(1, capacity)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+async def replay(plan, base: str, payloads: dict, workers: int, timeout: float, max_backlog: int):
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    results: list[dict] = []
+    pending: set = set()
+    t0 = time.perf_counter()
+
+    def call(offset, rid, method, path):
+        started = time.perf_counter()
+        url = urllib.parse.urljoin(base + "/", path.lstrip("/"))
+        status, _ = request(url, method=method, payload=payloads.get(rid) if method == "POST" else None, timeout=timeout)
+        done = time.perf_counter()
+        return {
+            "id": rid,
+            "offset": offset,
+            "status": status,
+            "ok": 200 <= status < 300,
+            "lag_ms": (started - t0 - offset) * 1000.0,
+            "service_ms": (done - started) * 1000.0,
+            "latency_ms": (done - t0 - offset) * 1000.0,
+            "done": done - t0,
+        }
+
+    def collect(fut):
+        pending.discard(fut)
+        results.append(fut.result())
+
+    with span("replay.dispatch", planned=len(plan)):
+        for offset, rid, method, path in plan:
+            delay = offset - (time.perf_counter() - t0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(pending) >= max_backlog:
+                results.append({"id": rid, "offset": offset, "status": -1, "ok": False, "dropped": True})
+                continue
+            fut = loop.run_in_executor(pool, call, offset, rid, method, path)
+            pending.add(fut)
+            fut.add_done_callback(collect)
+    with span("replay.drain", pending=len(pending)):
+        if pending:
+            await asyncio.wait(set(pending))
+    pool.shutdown(wait=True)
+    return results, time.perf_counter() - t0
+
+
+def summarize(plan, results: list[dict], wall_s: float, window_s: float, error_threshold: float) -> dict:
+    intended_span = plan[-1][0] - plan[0][0] if len(plan) > 1 else 0.0
+    completed = [r for r in results if not r.get("dropped")]
+    finish_span = max((r["done"] for r in completed), default=0.0)
+
+    per_route = {}
+    by_route: dict[str, list[dict]] = defaultdict(list)
+    for r in completed:
+        by_route[r["id"]].append(r)
+    for rid in sorted(by_route):
+        rows = by_route[rid]
+        lat = [r["latency_ms"] for r in rows]
+        svc = [r["service_ms"] for r in rows]
+        per_route[rid] = {
+            "n": len(rows),
+            "errors": sum(1 for r in rows if not r["ok"]),
+            "latency_p50_ms": round(pct(lat, 0.5), 1),
+            "latency_p90_ms": round(pct(lat, 0.9), 1),
+            "latency_p99_ms": round(pct(lat, 0.99), 1),
+            "service_p50_ms": round(pct(svc, 0.5), 1),
+            "service_p99_ms": round(pct(svc, 0.99), 1),
+        }
+
+    windows: dict[int, list[dict]] = defaultdict(list)
+    for r in results:
+        windows[int(r["offset"] // window_s)].append(r)
+    onset = None
+    for w in sorted(windows):
+        rows = windows[w]
+        err = sum(1 for r in rows if not r["ok"]) / len(rows)
+        if err >= error_threshold:
+            onset = {
+                "offset_s": round(w * window_s, 3),
+                "offered_rps": round(len(rows) / window_s, 2),
+                "error_rate": round(err, 3),
+                "statuses": sorted({r["status"] for r in rows if not r["ok"]}),
+            }
+            break
+
+    first_error = min((r["offset"] for r in results if not r["ok"]), default=None)
+    lags = [r["lag_ms"] for r in completed]
+    return {
+        "planned": len(plan),
+        "completed": len(completed),
+        "dropped": len(results) - len(completed),
+        "errors": sum(1 for r in results if not r["ok"]),
+        "intended_rps": round(len(plan) / intended_span, 2) if intended_span > 0 else None,
+        "achieved_rps": round(len(completed) / finish_span, 2) if finish_span > 0 else None,
+        "wall_s": round(wall_s, 3),
+        "dispatch_lag_p99_ms": round(pct(lags, 0.99), 1),
+        "first_error_offset_s": round(first_error, 3) if first_error is not None else None,
+        "error_onset": onset,
+        "per_route": per_route,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", help="NDJSON file exported by ManicAI")
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base", help="Base URL, e.g. http://173.212.203.211:8788")
+    target.add_argument("--stand-in", action="store_true", help="Replay against a local stand-in server")
+    ap.add_argument("--probe-post", action="store_true", help="Replay POST routes against --base (implied by --stand-in)")
+    ap.add_argument("--speed", type=float, default=1.0, help="Time compression factor (N x faster)")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="Throughput", help="Cadence profile the history was recorded under")
+    ap.add_argument("--state-poll-sec", type=float, default=None, help="Synthesized /api/state poll interval (default: profile refresh; 0 = logged events only)")
+    ap.add_argument("--max-idle", type=float, default=0.0, help="Clamp recorded idle gaps to this many seconds (0 = keep)")
+    ap.add_argument("--limit", type=int, default=0, help="Replay at most N calls")
+    ap.add_argument("--workers", type=int, default=16)
+    ap.add_argument("--max-backlog", type=int, default=0, help="Drop calls once this many are queued (default 50 x workers)")
+    ap.add_argument("--timeout", type=float, default=4.0)
+    ap.add_argument("--window", type=float, default=5.0, help="Window (replay seconds) for error onset detection")
+    ap.add_argument("--error-threshold", type=float, default=0.05)
+    ap.add_argument("--stand-in-latency-ms", type=float, default=40.0)
+    ap.add_argument("--stand-in-capacity", type=int, default=8, help="Concurrent calls before the stand-in returns 503")
+    ap.add_argument("--out", default="", help="Also write the JSON report here")
+    manicai_trace.add_trace_argument(ap)
+    args = ap.parse_args(argv)
+    manicai_trace.configure("replay_control_plane", args.trace)
+
+    if args.speed <= 0:
+        ap.error("--speed must be > 0")
+    poll_sec = PROFILES[args.profile]["refresh_sec"] if args.state_poll_sec is None else args.state_poll_sec
+    if poll_sec < 0:
+        ap.error("--state-poll-sec must be >= 0")
+
+    events = load_events(args.path)
+    plan, skipped, synthesized = build_plan(events, args.speed, args.max_idle, args.stand_in or args.probe_post, poll_sec)
+    if args.limit > 0:
+        plan = plan[: args.limit]
+    if not plan:
+        print(json.dumps({"planned": 0, "skipped": skipped, "synthesized_state_polls": synthesized}, indent=2))
+        print("\nnothing to replay (POST routes need --probe-post or --stand-in)")
+        return 1
+
+    server = None
+    if args.stand_in:
+        server, base = start_stand_in(args.stand_in_latency_ms, args.stand_in_capacity)
+    else:
+        base = args.base.rstrip("/")
+    payloads = sample_payloads(*discover_samples(base))
+
+    workers = max(1, args.workers)
+    max_backlog = args.max_backlog if args.max_backlog > 0 else workers * 50
+    results, wall_s = asyncio.run(replay(plan, base, payloads, workers, args.timeout, max_backlog))
+    if server is not None:
+        server.shutdown()
+
+    report = {
+        "base": base,
+        "speed": args.speed,
+        "workers": workers,
+        "skipped": skipped,
+        "state_polls": {"sampled_every_s": STATE_SAMPLE_SEC, "poll_sec": poll_sec, "synthesized": synthesized},
+    }
+    report.update(summarize(plan, results, wall_s, args.window, args.error_threshold))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"[replay] wrote {args.out}")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
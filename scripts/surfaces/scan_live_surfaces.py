@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import sys
 import time
 import urllib.error
 import urllib.request
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import manicai_trace  # noqa: E402
+from manicai_trace import span  # noqa: E402
+
 HOSTS = [
     "173.212.203.211",
     "149.102.153.201",
@@ -17,11 +22,21 @@ PORTS = [8788, 8421, 9801, 9750]
 
 
 def fetch(url: str, timeout: float = 4.0):
+    with span("http", cat="net", url=url) as sp:
+        out = _fetch(url, timeout)
+        sp.set(status=out["status"])
+        return out
+
+
+def _fetch(url: str, timeout: float):
     req = urllib.request.Request(url, headers={"User-Agent": "manicai-surface-scan"})
     t0 = time.time()
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
+        with span("http.open", cat="net"):
+            resp = urllib.request.urlopen(req, timeout=timeout)
+        with resp:
+            with span("http.read", cat="net"):
+                data = resp.read()
             return {
                 "ok": True,
                 "status": getattr(resp, "status", 200),
@@ -41,6 +56,11 @@ def fetch(url: str, timeout: float = 4.0):
 
 
 def scan_surface(base: str):
+    with span("scan_surface", base=base):
+        return _scan_surface(base)
+
+
+def _scan_surface(base: str):
     state = fetch(f"{base}/api/state")
     health = fetch(f"{base}/health")
     tmux = fetch(f"{base}/tmux")
@@ -50,7 +70,8 @@ def scan_surface(base: str):
     smoke = None
     if state["ok"]:
         try:
-            doc = json.loads(state["body"])
+            with span("json.parse", bytes=state["bytes"]):
+                doc = json.loads(state["body"])
             sessions = len(doc.get("sessions", []))
             candidates = len(doc.get("takeover_candidates", []))
             smoke = (doc.get("smoke") or {}).get("status")
@@ -73,10 +94,12 @@ def scan_surface(base: str):
     }
 
 
-def main():
+def main(argv=None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--out-dir", default="docs/surfaces")
-    args = ap.parse_args()
+    manicai_trace.add_trace_argument(ap)
+    args = ap.parse_args(argv)
+    manicai_trace.configure("scan_live_surfaces", args.trace)
 
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -88,6 +111,13 @@ def main():
             base = f"http://{host}:{port}"
             rows.append(scan_surface(base))
 
+    with span("report.write"):
+        paths = write_reports(out_dir, ts, rows)
+    for path in paths:
+        print(f"WROTE={path}")
+
+
+def write_reports(out_dir: Path, ts: str, rows: list):
     payload = {
         "timestamp": ts,
         "rows": rows,
@@ -111,10 +141,7 @@ def main():
     md_path.write_text(txt, encoding="utf-8")
     md_latest.write_text(txt, encoding="utf-8")
 
-    print(f"WROTE={json_path}")
-    print(f"WROTE={latest_path}")
-    print(f"WROTE={md_path}")
-    print(f"WROTE={md_latest}")
+    return [json_path, latest_path, md_path, md_latest]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Build a multi-resolution timeline index from ManicAI prompt history.
+
+The index keeps every track's events sorted by time and precomputes rollup
+pyramids (event counts per TimelineKind per bucket at 1s/1m/1h/1d), so range
+selection and zoomed views are bucket lookups instead of full re-sorts.
+Re-running `update` only consumes lines appended since the last run; if the
+app rewrote the file, it is rescanned and already-indexed events are skipped
+by id.
+
+Usage:
+  python3 scripts/timeline_index.py update ~/Library/Application\\ Support/ManicAI/prompt-history.ndjson
+  python3 scripts/timeline_index.py tracks
+  python3 scripts/timeline_index.py counts --track ALL --start 1760000000 --end 1760086400
+  python3 scripts/timeline_index.py histogram --track host:1 --resolution 1h --start ... --end ...
+  python3 scripts/timeline_index.py events --track host:1 --start ... --end ... --limit 50
+  python3 scripts/timeline_index.py counts --track host:1 --trace
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import manicai_trace
+from manicai_trace import span
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_INDEX = ROOT / "logs" / "timeline" / "timeline-index.json"
+INDEX_VERSION = 1
+ALL_TRACK = "ALL"
+KINDS = ["prompt", "duplex", "ontology", "git", "file", "service"]
+RESOLUTIONS = [("1d", 86400), ("1h", 3600), ("1m", 60), ("1s", 1)]
+HEAD_BYTES = 4096
+
+
+def event_key(ev: dict) -> str:
+    if ev.get("id"):
+        return str(ev["id"])
+    raw = f"{ev.get('ts', 0)}|{ev.get('route', '-')}|{ev.get('target') or '-'}|{ev.get('prompt', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def track_of(ev: dict) -> str:
+    return ev.get("target") or "-"
+
+
+def kind_of(ev: dict) -> str:
+    kind = ev.get("kind") or "prompt"
+    return kind if kind in KINDS else "prompt"
+
+
+class HistoryCursor:
+    """Tracks how far an append-only NDJSON history has been consumed.
+
+    The app rewrites prompt-history.ndjson wholesale on export; a changed head
+    or a shrunk file is treated as a rewrite and read from the start, leaving
+    deduplication to the caller.
+    """
+
+    def __init__(self, source: str = "", offset: int = 0, head_sha1: str = ""):
+        self.source = source
+        self.offset = offset
+        self.head_sha1 = head_sha1
+        self.rescanned = False
+
+    @classmethod
+    def from_dict(cls, doc: dict) -> "HistoryCursor":
+        return cls(doc.get("source", ""), int(doc.get("offset", 0)), doc.get("head_sha1", ""))
+
+    def to_dict(self) -> dict:
+        return {"source": self.source, "offset": self.offset, "head_sha1": self.head_sha1}
+
+    def read(self, history: Path):
+        """Yield decoded events for complete lines not consumed yet."""
+        size = history.stat().st_size
+        with history.open("rb") as f:
+            head = hashlib.sha1(f.read(min(self.offset, HEAD_BYTES))).hexdigest()
+            same_file = self.source == str(history) and self.offset <= size and head == self.head_sha1
+            self.rescanned = not same_file
+            consumed = self.offset if same_file else 0
+            f.seek(consumed)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                consumed += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+            f.seek(0)
+            self.head_sha1 = hashlib.sha1(f.read(min(consumed, HEAD_BYTES))).hexdigest()
+        self.source = str(history)
+        self.offset = consumed
+
+
+class TimelineIndex:
+    def __init__(self):
+        self.cursor = HistoryCursor()
+        self.tracks: dict[str, list[dict]] = defaultdict(list)
+        self.rollups: dict[str, dict[str, dict[int, dict[str, int]]]] = {
+            name: defaultdict(dict) for name, _ in RESOLUTIONS
+        }
+        self.seen: set[str] = set()
+        self._ts: dict[str, list[float]] = defaultdict(list)
+        # sorted non-empty bucket starts, per resolution and track
+        self._keys: dict[str, dict[str, list[int]]] = {name: defaultdict(list) for name, _ in RESOLUTIONS}
+
+    @classmethod
+    def load(cls, path: Path) -> "TimelineIndex":
+        idx = cls()
+        if not path.exists():
+            return idx
+        with span("index.load", path=str(path)):
+            doc = json.loads(path.read_text(encoding="utf-8"))
+        if doc.get("version") != INDEX_VERSION:
+            return idx
+        idx.cursor = HistoryCursor.from_dict(doc)
+        for name, events in (doc.get("tracks") or {}).items():
+            idx.tracks[name] = events
+            idx._ts[name] = [e["ts"] for e in events]
+            idx.seen.update(event_key(e) for e in events)
+        for res, by_track in (doc.get("rollups") or {}).items():
+            if res not in idx.rollups:
+                continue
+            for name, buckets in by_track.items():
+                idx.rollups[res][name] = {int(b): counts for b, counts in buckets.items()}
+                idx._keys[res][name] = sorted(idx.rollups[res][name])
+        return idx
+
+    def save(self, path: Path) -> None:
+        doc = {
+            "version": INDEX_VERSION,
+            **self.cursor.to_dict(),
+            "tracks": {name: self.tracks[name] for name in sorted(self.tracks)},
+            "rollups": {
+                res: {name: {str(b): by_track[name][b] for b in sorted(by_track[name])} for name in sorted(by_track)}
+                for res, by_track in self.rollups.items()
+            },
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with span("index.save", path=str(path)):
+            tmp.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+
+    def insert(self, ev: dict) -> bool:
+        key = event_key(ev)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        ts = float(ev.get("ts", 0) or 0)
+        kind = kind_of(ev)
+        name = track_of(ev)
+        row = {
+            "id": key,
+            "ts": ts,
+            "route": ev.get("route", "-"),
+            "kind": kind,
+            "prompt": ev.get("prompt", ""),
+        }
+        if ev.get("summary"):
+            row["summary"] = ev["summary"]
+
+        stamps = self._ts[name]
+        if not stamps or ts >= stamps[-1]:
+            stamps.append(ts)
+            self.tracks[name].append(row)
+        else:
+            i = bisect.bisect_right(stamps, ts)
+            stamps.insert(i, ts)
+            self.tracks[name].insert(i, row)
+
+        sec = int(math.floor(ts))
+        for res, width in RESOLUTIONS:
+            bucket = sec - sec % width
+            for t in (name, ALL_TRACK):
+                counts = self.rollups[res][t].get(bucket)
+                if counts is None:
+                    counts = self.rollups[res][t][bucket] = {}
+                    bisect.insort(self._keys[res][t], bucket)
+                counts[kind] = counts.get(kind, 0) + 1
+        return True
+
+    def update_from(self, history: Path) -> int:
+        """Consume new lines from `history`; returns the number of events added."""
+        added = 0
+        with span("history.ingest", start=self.cursor.offset) as sp:
+            for ev in self.cursor.read(history):
+                if self.insert(ev):
+                    added += 1
+            sp.set(added=added, rescan=self.cursor.rescanned)
+        return added
+
+    def track_names(self) -> list[str]:
+        return sorted(self.tracks)
+
+    def events(self, track: str, start: float, end: float, limit: int = 0) -> list[dict]:
+        """Time-sorted events in [start, end] for one track (or ALL)."""
+        if track == ALL_TRACK:
+            rows = heapq.merge(*(self._slice(name, start, end) for name in self.tracks), key=lambda r: r["ts"])
+        else:
+            rows = self._slice(track, start, end)
+        return list(itertools.islice(rows, limit)) if limit > 0 else list(rows)
+
+    def _slice(self, track: str, start: float, end: float) -> list[dict]:
+        stamps = self._ts.get(track) or []
+        lo = bisect.bisect_left(stamps, start)
+        hi = bisect.bisect_right(stamps, end)
+        return self.tracks[track][lo:hi]
+
+    def _add_range(self, out: dict[str, int], res: str, track: str, lo: int, hi: int) -> None:
+        keys = self._keys[res].get(track) or []
+        buckets = self.rollups[res].get(track, {})
+        for b in keys[bisect.bisect_left(keys, lo) : bisect.bisect_left(keys, hi)]:
+            for kind, n in buckets[b].items():
+                out[kind] = out.get(kind, 0) + n
+
+    def counts(self, track: str, start: float, end: float) -> dict[str, int]:
+        """Per-kind counts over whole seconds [floor(start), floor(end)].
+
+        The range is split into an aligned core of the coarsest buckets plus
+        finer ragged edges; each piece is a bisect over that resolution's
+        non-empty bucket keys, so empty stretches cost nothing.
+        """
+        out: dict[str, int] = {}
+        lo = int(math.floor(start))
+        hi = int(math.floor(end)) + 1
+        fine_to_coarse = RESOLUTIONS[::-1]
+        for (res, _), coarser in itertools.zip_longest(fine_to_coarse, fine_to_coarse[1:]):
+            if lo >= hi:
+                break
+            inner_lo = hi if coarser is None else -(-lo // coarser[1]) * coarser[1]
+            inner_hi = hi if coarser is None else hi // coarser[1] * coarser[1]
+            if inner_lo >= inner_hi:
+                self._add_range(out, res, track, lo, hi)
+                break
+            self._add_range(out, res, track, lo, inner_lo)
+            self._add_range(out, res, track, inner_hi, hi)
+            lo, hi = inner_lo, inner_hi
+        return out
+
+    def histogram(self, track: str, resolution: str, start: float, end: float) -> list[tuple[int, dict[str, int]]]:
+        """Non-empty buckets at `resolution` overlapping [start, end]."""
+        width = dict(RESOLUTIONS)[resolution]
+        buckets = self.rollups[resolution].get(track, {})
+        keys = self._keys[resolution].get(track) or []
+        first = int(math.floor(start))
+        lo = bisect.bisect_left(keys, first - first % width)
+        hi = bisect.bisect_right(keys, end)
+        return [(b, buckets[b]) for b in keys[lo:hi]]
+
+    def cadence_deltas(self, track: str) -> list[float]:
+        stamps = self._ts.get(track) or []
+        return [max(0.0, b - a) for a, b in zip(stamps, stamps[1:])]
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--index", default=str(DEFAULT_INDEX), help="Index JSON path")
+    # --trace sits on each subcommand so a bare `--trace` cannot swallow the command name
+    common = argparse.ArgumentParser(add_help=False)
+    manicai_trace.add_trace_argument(common)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    up = sub.add_parser("update", help="Index new lines from prompt-history.ndjson", parents=[common])
+    up.add_argument("history", help="NDJSON file exported by ManicAI")
+
+    sub.add_parser("tracks", help="List tracks with event counts", parents=[common])
+
+    for name in ("counts", "histogram", "events"):
+        q = sub.add_parser(name, parents=[common])
+        q.add_argument("--track", default=ALL_TRACK)
+        q.add_argument("--start", type=float, default=0.0)
+        q.add_argument("--end", type=float, default=float(2**40))
+        if name == "histogram":
+            q.add_argument("--resolution", choices=[r for r, _ in RESOLUTIONS], default="1m")
+        if name == "events":
+            q.add_argument("--limit", type=int, default=0)
+
+    args = ap.parse_args(argv)
+    manicai_trace.configure("timeline_index", args.trace)
+
+    index_path = Path(args.index)
+    idx = TimelineIndex.load(index_path)
+
+    if args.cmd == "update":
+        added = idx.update_from(Path(args.history))
+        idx.save(index_path)
+        total = sum(len(v) for v in idx.tracks.values())
+        print(f"[timeline-index] added={added} total={total} tracks={len(idx.tracks)} offset={idx.cursor.offset}")
+        print(f"[timeline-index] wrote {index_path}")
+        return 0
+
+    if args.cmd == "tracks":
+        for name in idx.track_names():
+            print(f"- {name}: n={len(idx.tracks[name])}")
+        return 0
+
+    with span(f"query.{args.cmd}", track=args.track):
+        if args.cmd == "counts":
+            out = idx.counts(args.track, args.start, args.end)
+        elif args.cmd == "histogram":
+            out = [{"bucket": b, "counts": c} for b, c in idx.histogram(args.track, args.resolution, args.start, args.end)]
+        else:
+            out = idx.events(args.track, args.start, args.end, args.limit)
+    print(json.dumps(out, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
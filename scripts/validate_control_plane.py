@@ -4,6 +4,7 @@
 Usage:
   python3 scripts/validate_control_plane.py --base http://173.212.203.211:8788
   python3 scripts/validate_control_plane.py --base http://... --probe-post
+  python3 scripts/validate_control_plane.py --base http://... --trace
 """
 
 from __future__ import annotations
@@ -14,6 +15,9 @@ import urllib.error
 import urllib.parse
 import urllib.request
 
+import manicai_trace
+from manicai_trace import span
+
 
 ROUTES = [
     ("state", "GET", "/api/state", True),
@@ -28,45 +32,40 @@ ROUTES = [
 ]
 
 
-def request(url: str, method: str = "GET", payload: dict | None = None) -> tuple[int, str]:
+def request(url: str, method: str = "GET", payload: dict | None = None, timeout: float = 4) -> tuple[int, str]:
     data = None
     headers = {}
     if payload is not None:
         data = json.dumps(payload).encode("utf-8")
         headers["Content-Type"] = "application/json"
     req = urllib.request.Request(url=url, method=method, data=data, headers=headers)
-    try:
-        with urllib.request.urlopen(req, timeout=4) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
+    with span("http", cat="net", method=method, url=url) as sp:
+        try:
+            with span("http.open", cat="net"):
+                resp = urllib.request.urlopen(req, timeout=timeout)
+            with resp, span("http.read", cat="net"):
+                body = resp.read().decode("utf-8", errors="replace")
+            sp.set(status=resp.status)
             return resp.status, body
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace") if e.fp else ""
-        return e.code, body
-    except Exception as e:  # noqa: BLE001
-        return 0, str(e)
+        except urllib.error.HTTPError as e:
+            body = e.read().decode("utf-8", errors="replace") if e.fp else ""
+            sp.set(status=e.code)
+            return e.code, body
+        except Exception as e:  # noqa: BLE001
+            sp.set(status=0)
+            return 0, str(e)
 
 
-def main() -> int:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--base", required=True, help="Base URL, e.g. http://173.212.203.211:8788")
-    ap.add_argument("--probe-post", action="store_true", help="Probe POST routes with sample payloads")
-    args = ap.parse_args()
-
-    base = args.base.rstrip("/")
-    status, html = request(base + "/")
-    route_hints = []
-    if status == 200 and html:
-        for _, _, path, _ in ROUTES:
-            if path in html:
-                route_hints.append(path)
-
+def discover_samples(base: str) -> tuple[str, str, str]:
+    """Pick a (project, session, target) from live state to fill sample payloads."""
     state_status, state_body = request(base + "/api/state")
     sample_project = ""
     sample_session = ""
     sample_target = ""
     if state_status == 200:
         try:
-            state = json.loads(state_body)
+            with span("json.parse", bytes=len(state_body)):
+                state = json.loads(state_body)
             projects = state.get("projects") or []
             sessions = state.get("sessions") or []
             targets = state.get("takeover_candidates") or state.get("panes") or []
@@ -75,8 +74,11 @@ def main() -> int:
             sample_target = (targets[0] or {}).get("target", "") if targets else ""
         except Exception:
             pass
+    return sample_project, sample_session, sample_target
+
 
-    payload_by_id = {
+def sample_payloads(sample_project: str, sample_session: str, sample_target: str) -> dict[str, dict]:
+    return {
         "autopilot": {"prompt": "diagnose only", "project": sample_project, "max_targets": 1, "auto_approve": False},
         "smoke": {"project": sample_project},
         "queue_add": {"prompt": "noop", "project": sample_project, "session_id": sample_session},
@@ -87,6 +89,25 @@ def main() -> int:
         "snapshot_ingest": {"name": "validator-noop", "text": "noop"},
     }
 
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", required=True, help="Base URL, e.g. http://173.212.203.211:8788")
+    ap.add_argument("--probe-post", action="store_true", help="Probe POST routes with sample payloads")
+    manicai_trace.add_trace_argument(ap)
+    args = ap.parse_args(argv)
+    manicai_trace.configure("validate_control_plane", args.trace)
+
+    base = args.base.rstrip("/")
+    status, html = request(base + "/")
+    route_hints = []
+    if status == 200 and html:
+        for _, _, path, _ in ROUTES:
+            if path in html:
+                route_hints.append(path)
+
+    payload_by_id = sample_payloads(*discover_samples(base))
+
     report = []
     for rid, method, path, critical in ROUTES:
         url = urllib.parse.urljoin(base + "/", path.lstrip("/"))
@@ -121,7 +142,8 @@ def main() -> int:
             )
 
     critical_fail = [r for r in report if r["critical"] and not r["ok"]]
-    print(json.dumps({"base": base, "route_hints": route_hints, "report": report}, indent=2))
+    with span("report.write"):
+        print(json.dumps({"base": base, "route_hints": route_hints, "report": report}, indent=2))
     if critical_fail:
         print(f"\nFAIL: missing critical routes: {[r['path'] for r in critical_fail]}")
         return 2